@@ -1,12 +1,20 @@
 #!/usr/bin/env python3
-import json
+import argparse
+import atexit
+import bisect
+import csv
 import os
+import sys
 from dataclasses import dataclass, asdict
 from datetime import datetime, time, timedelta
-from typing import Optional, Dict, Any
+from functools import lru_cache
+from typing import IO, Optional, Dict, Any, List, Sequence, Tuple
+from zoneinfo import ZoneInfo
 
+import numpy as np
+import orjson
 import pandas as pd
-import pytz
+import requests_cache
 import yfinance as yf
 
 
@@ -29,7 +37,25 @@ LATEST_JSON = os.path.join(REPORTS_DIR, "latest.json")
 SUMMARY_JSON = os.path.join(REPORTS_DIR, "summary.json")
 INTRADAY_JSON = os.path.join(REPORTS_DIR, "intraday_today.json")
 
-ET = pytz.timezone("America/New_York")
+# Local cache of Yahoo history (not published with the reports). It only pays off for
+# local or repeated runs: the scheduled workflow starts from a fresh checkout every tick
+# and does not persist .cache/, so there it is never hit.
+CACHE_DIR = os.path.join(".cache", "yf")
+CACHE_TTL_SECONDS = 60  # during the session
+CACHE_TTL_AFTER_CLOSE_SECONDS = 24 * 3600  # session bars are final once the last bar has closed
+BAR = timedelta(minutes=1)
+HTTP_CACHE_SECONDS = 30  # in-process HTTP cache shared by all tickers of a run
+YF_MAX_1M_DAYS = 7  # Yahoo serves at most ~7 days of 1m bars per request
+
+TRADE_LOG_COLS = [
+    "date", "direction", "entry_time", "entry_price", "exit_time", "exit_price",
+    "pnl_points", "pnl_usd", "exit_reason"
+]
+
+ET = ZoneInfo("America/New_York")
+
+# orjson writes tz-aware datetimes as ISO 8601 and numpy scalars natively
+JSON_OPTIONS = orjson.OPT_INDENT_2 | orjson.OPT_NAIVE_UTC | orjson.OPT_SERIALIZE_NUMPY
 
 
 @dataclass
@@ -54,18 +80,26 @@ def today_et(now_et: Optional[datetime] = None) -> datetime:
     return (now_et or datetime.now(ET)).astimezone(ET)
 
 
-def session_times(d: datetime) -> Dict[str, datetime]:
-    # Regular session 9:30–16:00 ET
-    session_open = d.replace(hour=9, minute=30, second=0, microsecond=0)
-    session_close = d.replace(hour=16, minute=0, second=0, microsecond=0)
+@lru_cache(maxsize=8)
+def _session_times_cached(date_key: str, tz_key: str) -> Tuple[datetime, datetime, datetime, datetime]:
+    # Regular session 9:30–16:00 ET; only depends on the session date
+    tz = ZoneInfo(tz_key)
+    day = datetime.strptime(date_key, "%Y-%m-%d")
+    session_open = day.replace(hour=9, minute=30, tzinfo=tz)
+    session_close = day.replace(hour=16, minute=0, tzinfo=tz)
     orb_end = session_open + timedelta(minutes=OPENING_RANGE_MINUTES)
     trade_start = orb_end  # 9:45 ET
     trade_end = session_open + timedelta(minutes=TRADING_WINDOW_MINUTES)
+    return session_open, orb_end, trade_start, min(trade_end, session_close)
+
+
+def session_times(d: datetime) -> Dict[str, datetime]:
+    session_open, orb_end, trade_start, trade_end = _session_times_cached(d.strftime("%Y-%m-%d"), str(d.tzinfo))
     return {
         "open": session_open,
         "orb_end": orb_end,
         "trade_start": trade_start,
-        "trade_end": min(trade_end, session_close),
+        "trade_end": trade_end,
     }
 
 
@@ -80,107 +114,368 @@ def trade_log_path(d: datetime) -> str:
 def load_state(d: datetime) -> TradeState:
     p = state_path(d)
     if os.path.exists(p):
-        with open(p, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        return TradeState(**data)
+        return TradeState(**read_json(p))
     return TradeState(session_date=d.strftime("%Y-%m-%d"))
 
 
+def read_json(p: str) -> Any:
+    with open(p, "rb") as f:
+        return orjson.loads(f.read())
+
+
+def write_json(p: str, obj: Any) -> None:
+    # Atomic: write a sibling temp file, then rename it over the target
+    tmp = f"{p}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(orjson.dumps(obj, option=JSON_OPTIONS))
+    os.replace(tmp, p)
+
+
 def save_state(st: TradeState, d: datetime) -> None:
-    p = state_path(d)
-    with open(p, "w", encoding="utf-8") as f:
-        json.dump(asdict(st), f, ensure_ascii=False, indent=2)
+    write_json(state_path(d), asdict(st))
+
+
+_SESSION: Optional[requests_cache.CachedSession] = None
+_TICKERS: Dict[str, yf.Ticker] = {}
+_TRADE_LOGS: Dict[str, Tuple[IO[str], csv.DictWriter]] = {}
+
+
+def ticker(symbol: str) -> yf.Ticker:
+    # One Ticker (and one HTTP session) per symbol for the whole run
+    global _SESSION
+    if symbol not in _TICKERS:
+        if _SESSION is None:
+            _SESSION = requests_cache.CachedSession(backend="memory", expire_after=HTTP_CACHE_SECONDS)
+        _TICKERS[symbol] = yf.Ticker(symbol, session=_SESSION)
+    return _TICKERS[symbol]
 
 
-def fetch_intraday_1m(symbol: str) -> pd.DataFrame:
-    # Use 2d to ensure we get today’s data reliably
-    df = yf.Ticker(symbol).history(period="2d", interval="1m", auto_adjust=False, actions=False)
+def cache_path(symbol: str, d: datetime, period: str) -> str:
+    return os.path.join(CACHE_DIR, f"yf_{symbol}_{period}_{d.strftime('%Y%m%d')}.pkl")
+
+
+def cache_fresh(p: str, now: datetime) -> bool:
+    if not os.path.exists(p):
+        return False
+    mtime = os.path.getmtime(p)
+    age = now.timestamp() - mtime
+    # The trade_end bar itself only completes one bar later
+    if mtime >= (session_times(now)["trade_end"] + BAR).timestamp():
+        return age < CACHE_TTL_AFTER_CLOSE_SECONDS
+    return age < CACHE_TTL_SECONDS
+
+
+def fetch_intraday_1m(symbol: str, now: Optional[datetime] = None, period: str = "2d") -> pd.DataFrame:
+    now = today_et(now)
+    p = cache_path(symbol, now, period)
+    if cache_fresh(p, now):
+        try:
+            return pd.read_pickle(p)
+        except Exception:
+            # Corrupt/partial cache file: refetch
+            pass
+
+    # Default 2d to ensure we get today’s data reliably
+    df = ticker(symbol).history(period=period, interval="1m", auto_adjust=False, actions=False)
     if df.empty:
         return df
-    # Localize to UTC then convert to ET
+    # Convert to ET (yfinance returns a tz-aware index; naive means UTC)
     if df.index.tz is None:
-        df.index = df.index.tz_localize("UTC")
-    df.index = df.index.tz_convert(ET)
+        df.index = df.index.tz_localize("UTC").tz_convert(ET)
+    else:
+        df.index = df.index.tz_convert(ET)
     # Standardize columns
-    df = df.rename(columns={c: c.capitalize() for c in df.columns})
-    return df[["Open", "High", "Low", "Close", "Volume"]]
+    df.columns = df.columns.str.capitalize()
+    df = df[["Open", "High", "Low", "Close", "Volume"]]
 
-
-def within(dt: datetime, a: datetime, b: datetime) -> bool:
-    return a <= dt <= b
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        df.to_pickle(p)
+    except Exception:
+        # best-effort, like the read: a cache failure must not cost the tick
+        pass
+    return df
+
+
+def to_ns(dt: datetime) -> int:
+    # Epoch nanoseconds (UTC), comparable with DatetimeIndex.asi8
+    return pd.Timestamp(dt).value
+
+
+def direction_sign(direction: Optional[str]) -> float:
+    # +1 long, -1 short: signed offsets let both directions share one code path
+    return 1.0 if direction == "long" else -1.0
+
+
+def manage_trade(
+    fav: np.ndarray,
+    adv: np.ndarray,
+    ts_ns: np.ndarray,
+    end_ns: int,
+    entry: float,
+    stop: float,
+    watermark: float,
+    be_triggered: bool,
+) -> Dict[str, Any]:
+    # Trailing stop / break-even / TP over the bars of an open trade, seen from the long
+    # side: fav = favorable extreme (High), adv = adverse extreme (Low). Shorts pass
+    # negated prices. Returns the state at the exit bar (or last bar) and the exit, if any.
+    # Kept as whole-array numpy ops rather than a JIT-compiled bar loop: a session is
+    # <= 390 bars, and each cron run starts cold, so a compile would cost more than it saves.
+
+    # Watermark and stop only ever ratchet in favor, so both are running maxima
+    wm = np.maximum.accumulate(np.maximum(fav, watermark))
+    be = be_triggered | ((wm - entry) >= BREAKEVEN_TRIGGER_POINTS)
+    stops = np.maximum(stop, wm - TRAIL_DISTANCE_POINTS)
+    stops = np.where(be, np.maximum(stops, entry), stops)
+
+    # Exit checks (TP first, then stop, then end of window)
+    hit_tp = fav >= entry + TAKE_PROFIT_POINTS
+    hit_stop = adv <= stops
+    hit_eod = ts_ns >= end_ns
+    hit = hit_tp | hit_stop | hit_eod
+
+    exit_reason = None
+    if hit.any():
+        k = int(np.argmax(hit))
+        exit_reason = "TP" if hit_tp[k] else "TrailingStop" if hit_stop[k] else "EOD"
+    else:
+        k = len(hit) - 1
+    return {
+        "exit_idx": k,
+        "exit_reason": exit_reason,
+        "watermark": float(wm[k]),
+        "stop": float(stops[k]),
+        "be_triggered": bool(be[k]),
+    }
 
 
 def compute_opening_range(df: pd.DataFrame, open_ts: datetime, orb_end: datetime) -> Optional[Dict[str, float]]:
-    mask = (df.index >= open_ts) & (df.index < orb_end)
-    orb = df.loc[mask]
-    if orb.empty:
+    # Index is sorted: slice [open_ts, orb_end) by position instead of masking
+    idx = df.index.asi8
+    lo = int(np.searchsorted(idx, to_ns(open_ts), side="left"))
+    hi = int(np.searchsorted(idx, to_ns(orb_end), side="left"))
+    if lo >= hi:
         return None
     return {
-        "high": float(orb["High"].max()),
-        "low": float(orb["Low"].min()),
+        "high": float(df["High"].to_numpy()[lo:hi].max()),
+        "low": float(df["Low"].to_numpy()[lo:hi].min()),
     }
 
 
+def trade_log_writer(p: str, mode: str = "a") -> csv.DictWriter:
+    # One open handle per log for the whole run (closed at exit); rows are flushed as written
+    if mode == "w" or p not in _TRADE_LOGS:
+        close_trade_log(p)
+        header = mode == "w" or not os.path.exists(p) or os.path.getsize(p) == 0
+        f = open(p, mode, encoding="utf-8", newline="")
+        w = csv.DictWriter(f, fieldnames=TRADE_LOG_COLS, extrasaction="ignore", lineterminator="\n")
+        if header:
+            w.writeheader()
+        _TRADE_LOGS[p] = (f, w)
+    return _TRADE_LOGS[p][1]
+
+
+def close_trade_log(p: str) -> None:
+    if p in _TRADE_LOGS:
+        _TRADE_LOGS.pop(p)[0].close()
+
+
+@atexit.register
+def close_trade_logs() -> None:
+    for p in list(_TRADE_LOGS):
+        close_trade_log(p)
+
+
 def append_trade_log(d: datetime, row: Dict[str, Any]) -> None:
     p = trade_log_path(d)
-    cols = [
-        "date", "direction", "entry_time", "entry_price", "exit_time", "exit_price",
-        "pnl_points", "pnl_usd", "exit_reason"
-    ]
-    exists = os.path.exists(p)
-    df = pd.DataFrame([row], columns=cols)
-    df.to_csv(p, mode="a", header=not exists, index=False)
+    trade_log_writer(p).writerow(row)
+    _TRADE_LOGS[p][0].flush()
 
 
-def update_summary(row: Dict[str, Any]) -> None:
-    # Maintain last 10 days
-    cols = [
-        "date", "direction", "entry_time", "entry_price", "exit_time", "exit_price",
-        "pnl_points", "pnl_usd", "win"
-    ]
-    new_df = pd.DataFrame([
-        {
-            "date": row["date"],
-            "direction": row["direction"],
-            "entry_time": row["entry_time"],
-            "entry_price": row["entry_price"],
-            "exit_time": row["exit_time"],
-            "exit_price": row["exit_price"],
-            "pnl_points": row["pnl_points"],
-            "pnl_usd": row["pnl_usd"],
-            "win": 1 if row["pnl_points"] > 0 else 0,
-        }
-    ], columns=cols)
+def write_trade_log(d: datetime, rows: List[Dict[str, Any]]) -> None:
+    # Replace the day's log (backfill regenerates whole sessions)
+    p = trade_log_path(d)
+    trade_log_writer(p, mode="w").writerows(rows)
+    _TRADE_LOGS[p][0].flush()
 
+
+def clear_trade_log(d: datetime) -> None:
+    p = trade_log_path(d)
+    close_trade_log(p)
+    if os.path.exists(p):
+        os.remove(p)
+
+
+def summary_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "date": row["date"],
+        "direction": row["direction"],
+        "entry_time": row["entry_time"],
+        "entry_price": row["entry_price"],
+        "exit_time": row["exit_time"],
+        "exit_price": row["exit_price"],
+        "pnl_points": row["pnl_points"],
+        "pnl_usd": row["pnl_usd"],
+        "win": 1 if row["pnl_points"] > 0 else 0,
+    }
+
+
+def is_missing(v: Any) -> bool:
+    return v is None or (isinstance(v, float) and v != v)
+
+
+def unify_numeric_columns(rows: List[Dict[str, Any]], cols: List[str]) -> None:
+    # Same rule as DataFrame dtype unification: a numeric column holding a float or a
+    # gap is float throughout, so ints are not written as "4" one run and "4.0" the next
+    for c in cols:
+        present = [r[c] for r in rows if c in r]
+        numeric = all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in present)
+        if present and numeric and (len(present) < len(rows) or any(isinstance(v, float) for v in present)):
+            for r in rows:
+                if c in r:
+                    r[c] = float(r[c])
+
+
+def update_summary(trades: List[Dict[str, Any]], replayed_dates: Sequence[str] = ()) -> Optional[Dict[str, Any]]:
+    # Maintain last 10 days. Rows for replayed_dates are dropped first, so a replayed
+    # session without a trade loses its stale row. Returns the summary just written
+    # (None if there was nothing to change).
+    new_rows = [summary_row(t) for t in trades]
+    dropped = set(replayed_dates)
+    if not new_rows and not (dropped and os.path.exists(SUMMARY_CSV)):
+        return None
+
+    cols = list(new_rows[0]) if new_rows else []
+    rows = []
     if os.path.exists(SUMMARY_CSV):
         try:
             cur = pd.read_csv(SUMMARY_CSV)
+            cols = list(dict.fromkeys([*cur.columns, *cols]))
+            rows = cur.to_dict(orient="records")
         except Exception:
-            cur = pd.DataFrame(columns=cols)
-        cur = pd.concat([cur, new_df], ignore_index=True)
-    else:
-        cur = new_df
+            rows = []
 
-    # Keep only last 10 days by date
-    cur = cur.sort_values("date").drop_duplicates("date", keep="last")
-    if len(cur) > 10:
-        cur = cur.tail(10)
-    cur.to_csv(SUMMARY_CSV, index=False)
+    if not rows and not new_rows:
+        return None
 
-    # Also write JSON summary for the UI
+    # The file is kept sorted with one row per date: replace/insert in place
+    rows = [r for r in rows if r.get("date") not in dropped]
+    for new_row in new_rows:
+        rows = [r for r in rows if r.get("date") != new_row["date"]]
+        rows.insert(bisect.bisect_right([r["date"] for r in rows], new_row["date"]), new_row)
+    # Records read back from the CSV carry NaN for cells that were empty: drop them,
+    # then give each column one cell type so the file formats the same on every rewrite
+    last_10 = [{k: v for k, v in r.items() if not is_missing(v)} for r in rows[-10:]]
+    unify_numeric_columns(last_10, cols)
+
+    # Write the records straight out; missing cells are left empty as to_csv would
+    with open(SUMMARY_CSV, "w", encoding="utf-8", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=cols, extrasaction="ignore", lineterminator="\n")
+        w.writeheader()
+        w.writerows(last_10)
+
+    def column(name: str) -> np.ndarray:
+        return np.array([r.get(name) for r in last_10], dtype=np.float64)
+
+    # Also write JSON summary for the UI (NaN-skipping like the pandas reductions)
     summary = {
-        "last_10": cur.to_dict(orient="records"),
-        "winrate": float(cur["win"].mean()) if len(cur) else None,
-        "total_pnl_points": float(cur["pnl_points"].sum()) if len(cur) else 0.0,
-        "total_pnl_usd": float(cur["pnl_usd"].sum()) if len(cur) else 0.0,
+        "last_10": last_10,
+        "winrate": float(np.nanmean(column("win"))) if last_10 else None,
+        "total_pnl_points": float(np.nansum(column("pnl_points"))) if last_10 else 0.0,
+        "total_pnl_usd": float(np.nansum(column("pnl_usd"))) if last_10 else 0.0,
     }
-    with open(SUMMARY_JSON, "w", encoding="utf-8") as f:
-        json.dump(summary, f, ensure_ascii=False, indent=2)
+    write_json(SUMMARY_JSON, summary)
+    return summary
 
 
 def write_latest(payload: Dict[str, Any]) -> None:
-    with open(LATEST_JSON, "w", encoding="utf-8") as f:
-        json.dump(payload, f, ensure_ascii=False, indent=2)
+    write_json(LATEST_JSON, payload)
+
+
+def run_session(
+    candles: pd.DataFrame,
+    st: TradeState,
+    times: Dict[str, datetime],
+    long_level: float,
+    short_level: float,
+) -> Optional[Dict[str, Any]]:
+    # Advance the trade state over the candles; returns the closed trade row, if any
+    # Typed float64 column arrays, extracted once (no 2-D block copy); indexing
+    # them yields numpy floats, so no per-bar float() coercion is needed
+    ts_ns = candles.index.asi8
+    H, L, C = (candles[col].to_numpy(dtype=np.float64, copy=False) for col in ("High", "Low", "Close"))
+
+    # Locate the trading window within the candles (index is sorted)
+    win_lo = int(np.searchsorted(ts_ns, to_ns(times["trade_start"]), side="left"))
+    win_hi = int(np.searchsorted(ts_ns, to_ns(times["trade_end"]), side="right"))
+
+    # Entry logic: first bar breaking out of the range, long checked first
+    row_out = None
+    manage_from = win_lo
+    if not st.trade_open and not st.trade_executed and win_lo < win_hi:
+        long_brk = H[win_lo:win_hi] >= long_level
+        short_brk = L[win_lo:win_hi] <= short_level
+        brk = long_brk | short_brk
+        if brk.any():
+            k = int(np.argmax(brk))
+            i = win_lo + k
+            c = C[i]
+            # Entry at candle close
+            st.trade_open = True
+            st.trade_executed = True
+            st.direction = "long" if long_brk[k] else "short"
+            st.entry_time = candles.index[i].isoformat()
+            st.entry_price = c
+            st.watermark_price = c  # best favorable price so far
+            st.stop_price = c - direction_sign(st.direction) * TRAIL_DISTANCE_POINTS
+            st.be_triggered = False
+            manage_from = i
+
+    # Manage open trade from entry (or from the resumed position) to the end of the window
+    if st.trade_open and manage_from < win_hi:
+        direction = st.direction
+        entry = float(st.entry_price)
+        sign = direction_sign(direction)
+        # Shorts are mirrored so both directions share the long-side kernel
+        fav, adv = (H, L) if sign > 0 else (-L, -H)
+        sl = slice(manage_from, win_hi)
+        res = manage_trade(
+            fav[sl], adv[sl], ts_ns[sl], to_ns(times["trade_end"]),
+            sign * entry, sign * float(st.stop_price), sign * float(st.watermark_price), st.be_triggered,
+        )
+        st.watermark_price = float(sign * res["watermark"])
+        st.stop_price = float(sign * res["stop"])
+        st.be_triggered = res["be_triggered"]
+
+        exit_reason = res["exit_reason"]
+        if exit_reason:
+            i = manage_from + res["exit_idx"]
+            if exit_reason == "TP":
+                exit_price = entry + sign * TAKE_PROFIT_POINTS
+            elif exit_reason == "TrailingStop":
+                exit_price = st.stop_price
+            else:
+                exit_price = C[i]
+            pnl_points = sign * (exit_price - entry)
+            pnl_usd = pnl_points * POINT_VALUE
+            row_out = {
+                "date": st.session_date,
+                "direction": direction,
+                "entry_time": st.entry_time,
+                "entry_price": round(entry, 2),
+                "exit_time": candles.index[i].isoformat(),
+                "exit_price": round(float(exit_price), 2),
+                "pnl_points": round(float(pnl_points), 2),
+                "pnl_usd": round(float(pnl_usd), 2),
+                "exit_reason": exit_reason,
+            }
+            st.trade_open = False
+            st.direction = None
+
+    if not candles.empty:
+        st.last_processed_ts = candles.index[-1].isoformat()
+    return row_out
 
 
 def main():
@@ -193,23 +488,39 @@ def main():
         write_latest({
             "status": "inactive",
             "reason": "weekend",
-            "now_et": now.isoformat(),
+            "now_et": now,
+        })
+        return
+
+    # Guard: nothing can advance before the session opens, so skip the fetch
+    if now < times["open"] - timedelta(minutes=1):
+        write_latest({
+            "status": "pre_session",
+            "now_et": now,
+            "session_date": now.strftime('%Y-%m-%d'),
+            "session_open": times["open"],
+            "orb_end": times["orb_end"],
         })
         return
 
     # Load data
-    df = fetch_intraday_1m(SYMBOL)
+    df = fetch_intraday_1m(SYMBOL, now)
     if df.empty:
         write_latest({
             "status": "error",
             "reason": "no_data",
-            "now_et": now.isoformat(),
+            "now_et": now,
         })
         return
 
-    # Filter to today only
+    # Filter to today only; the index is sorted, so locate the session bounds once
+    # and slice by position everywhere below
     today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-    today_df = df[df.index >= today_start]
+    idx = df.index.asi8
+    today_i = int(np.searchsorted(idx, to_ns(today_start), side="left"))
+    open_i = int(np.searchsorted(idx, to_ns(times["open"]), side="left"))
+    view_end_i = int(np.searchsorted(idx, to_ns(min(now, times["trade_end"])), side="right"))
+    today_df = df.iloc[today_i:]
     st = load_state(now)
 
     # Compute opening range
@@ -218,10 +529,10 @@ def main():
         # before/during ORB window
         write_latest({
             "status": "pre_orb",
-            "now_et": now.isoformat(),
+            "now_et": now,
             "session_date": now.strftime('%Y-%m-%d'),
-            "session_open": times["open"].isoformat(),
-            "orb_end": times["orb_end"].isoformat(),
+            "session_open": times["open"],
+            "orb_end": times["orb_end"],
         })
         save_state(st, now)
         return
@@ -232,152 +543,33 @@ def main():
     short_level = orb_low - OFFSET_POINTS
 
     # Build candles we need to process from last_processed_ts to now
-    process_mask = today_df.index >= times["open"]
+    candles = df.iloc[open_i:]
     if st.last_processed_ts:
         try:
-            last_ts = datetime.fromisoformat(st.last_processed_ts)
+            # Compare absolute epoch ns; a naive timestamp is ET
+            last_ts = pd.Timestamp(st.last_processed_ts)
             if last_ts.tzinfo is None:
-                last_ts = ET.localize(last_ts)
-            else:
-                last_ts = last_ts.astimezone(ET)
-            process_mask = today_df.index > last_ts
+                last_ts = last_ts.tz_localize(ET)
+            resume_i = int(np.searchsorted(idx, last_ts.value, side="right"))
+            candles = df.iloc[max(resume_i, today_i):]
         except Exception:
             # Fallback: process from session open
-            process_mask = today_df.index >= times["open"]
-    candles = today_df.loc[process_mask]
-
-    # Iterate candles in chronological order
-    for ts, row in candles.iterrows():
-        # Only manage entries/exits during trading window
-        in_window = within(ts, times["trade_start"], times["trade_end"]) or (st.trade_open and ts <= times["trade_end"])
-        if not in_window:
-            st.last_processed_ts = ts.isoformat()
-            continue
+            candles = df.iloc[open_i:]
 
-        o, h, l, c = float(row["Open"]), float(row["High"]), float(row["Low"]), float(row["Close"])
-
-        # Entry logic
-        if not st.trade_open and not st.trade_executed and ts >= times["trade_start"]:
-            if h >= long_level:
-                # Long entry at candle close
-                st.trade_open = True
-                st.trade_executed = True
-                st.direction = "long"
-                st.entry_time = ts.isoformat()
-                st.entry_price = c
-                st.watermark_price = c  # best favorable price so far
-                st.stop_price = max(c - TRAIL_DISTANCE_POINTS, float('-inf'))
-                st.be_triggered = False
-            elif l <= short_level:
-                # Short entry at candle close
-                st.trade_open = True
-                st.trade_executed = True
-                st.direction = "short"
-                st.entry_time = ts.isoformat()
-                st.entry_price = c
-                st.watermark_price = c
-                st.stop_price = min(c + TRAIL_DISTANCE_POINTS, float('inf'))
-                st.be_triggered = False
-
-        # Manage open trade
-        if st.trade_open:
-            direction = st.direction
-            entry = float(st.entry_price)
-            # Update watermark and trailing stop
-            if direction == "long":
-                # Update watermark on favorable move
-                if h > st.watermark_price:
-                    st.watermark_price = h
-                # Trailing logic
-                new_trail = st.watermark_price - TRAIL_DISTANCE_POINTS
-                st.stop_price = max(st.stop_price, new_trail)
-                # Break-even trigger
-                if not st.be_triggered and (st.watermark_price - entry) >= BREAKEVEN_TRIGGER_POINTS:
-                    st.stop_price = max(st.stop_price, entry)
-                    st.be_triggered = True
-                # Exit checks (TP first, then stop)
-                tp_price = entry + TAKE_PROFIT_POINTS
-                exit_reason = None
-                exit_price = None
-                if h >= tp_price:
-                    exit_price = tp_price
-                    exit_reason = "TP"
-                elif l <= st.stop_price:
-                    exit_price = st.stop_price
-                    exit_reason = "TrailingStop"
-                elif ts >= times["trade_end"]:
-                    exit_price = c
-                    exit_reason = "EOD"
-
-                if exit_reason:
-                    pnl_points = (exit_price - entry)
-                    pnl_usd = pnl_points * POINT_VALUE
-                    row_out = {
-                        "date": st.session_date,
-                        "direction": direction,
-                        "entry_time": st.entry_time,
-                        "entry_price": round(entry, 2),
-                        "exit_time": ts.isoformat(),
-                        "exit_price": round(float(exit_price), 2),
-                        "pnl_points": round(float(pnl_points), 2),
-                        "pnl_usd": round(float(pnl_usd), 2),
-                        "exit_reason": exit_reason,
-                    }
-                    append_trade_log(now, row_out)
-                    update_summary(row_out)
-                    st.trade_open = False
-                    st.direction = None
-
-            elif direction == "short":
-                if l < st.watermark_price:
-                    st.watermark_price = l
-                new_trail = st.watermark_price + TRAIL_DISTANCE_POINTS
-                st.stop_price = min(st.stop_price, new_trail)
-                if not st.be_triggered and (entry - st.watermark_price) >= BREAKEVEN_TRIGGER_POINTS:
-                    st.stop_price = min(st.stop_price, entry)
-                    st.be_triggered = True
-                tp_price = entry - TAKE_PROFIT_POINTS
-                exit_reason = None
-                exit_price = None
-                if l <= tp_price:
-                    exit_price = tp_price
-                    exit_reason = "TP"
-                elif h >= st.stop_price:
-                    exit_price = st.stop_price
-                    exit_reason = "TrailingStop"
-                elif ts >= times["trade_end"]:
-                    exit_price = c
-                    exit_reason = "EOD"
-
-                if exit_reason:
-                    pnl_points = (entry - exit_price)
-                    pnl_usd = pnl_points * POINT_VALUE
-                    row_out = {
-                        "date": st.session_date,
-                        "direction": direction,
-                        "entry_time": st.entry_time,
-                        "entry_price": round(entry, 2),
-                        "exit_time": ts.isoformat(),
-                        "exit_price": round(float(exit_price), 2),
-                        "pnl_points": round(float(pnl_points), 2),
-                        "pnl_usd": round(float(pnl_usd), 2),
-                        "exit_reason": exit_reason,
-                    }
-                    append_trade_log(now, row_out)
-                    update_summary(row_out)
-                    st.trade_open = False
-                    st.direction = None
-
-        st.last_processed_ts = ts.isoformat()
+    summary = None
+    row_out = run_session(candles, st, times, long_level, short_level)
+    if row_out:
+        append_trade_log(now, row_out)
+        summary = update_summary([row_out])
 
     # Build latest.json snapshot
     latest: Dict[str, Any] = {
         "status": "active",
-        "now_et": now.isoformat(),
+        "now_et": now,
         "session_date": now.strftime('%Y-%m-%d'),
-        "session_open": times["open"].isoformat(),
-        "orb_end": times["orb_end"].isoformat(),
-        "trade_window_end": times["trade_end"].isoformat(),
+        "session_open": times["open"],
+        "orb_end": times["orb_end"],
+        "trade_window_end": times["trade_end"],
         "opening_range": {
             "high": round(orb_high, 2),
             "low": round(orb_low, 2),
@@ -395,11 +587,8 @@ def main():
 
     if st.trade_open:
         # Unrealized PnL using last close
-        last_close = float(today_df.iloc[-1]["Close"]) if not today_df.empty else float("nan")
-        if st.direction == "long":
-            pnl_points = last_close - float(st.entry_price)
-        else:
-            pnl_points = float(st.entry_price) - last_close
+        last_close = today_df["Close"].iat[-1] if not today_df.empty else float("nan")
+        pnl_points = direction_sign(st.direction) * (last_close - float(st.entry_price))
         latest["trade"] = {
             "open": True,
             "direction": st.direction,
@@ -408,46 +597,96 @@ def main():
             "stop_price": round(float(st.stop_price), 2) if st.stop_price is not None else None,
             "watermark_price": round(float(st.watermark_price), 2) if st.watermark_price is not None else None,
             "be_triggered": st.be_triggered,
-            "unrealized_pnl_points": round(float(pnl_points), 2),
-            "unrealized_pnl_usd": round(float(pnl_points * POINT_VALUE), 2),
+            "unrealized_pnl_points": round(pnl_points, 2),
+            "unrealized_pnl_usd": round(pnl_points * POINT_VALUE, 2),
         }
     else:
         latest["trade"] = {"open": False, "trade_executed": st.trade_executed}
 
-    # Attach last 10 summary if present
-    if os.path.exists(SUMMARY_JSON):
-        with open(SUMMARY_JSON, "r", encoding="utf-8") as f:
-            latest["summary"] = json.load(f)
+    # Attach last 10 summary: the one just written, else the one on disk if present
+    if summary is not None:
+        latest["summary"] = summary
+    elif os.path.exists(SUMMARY_JSON):
+        latest["summary"] = read_json(SUMMARY_JSON)
 
     write_latest(latest)
     save_state(st, now)
 
     # Write intraday candles for today's session (for frontend chart)
     try:
-        mask = (today_df.index >= times["open"]) & (today_df.index <= min(now, times["trade_end"]))
-        view = today_df.loc[mask]
-        candles = []
-        for ts, r in view.iterrows():
-            candles.append({
-                "t": ts.isoformat(),
-                "o": round(float(r["Open"]), 2),
-                "h": round(float(r["High"]), 2),
-                "l": round(float(r["Low"]), 2),
-                "c": round(float(r["Close"]), 2),
-            })
+        view = df.iloc[open_i:view_end_i]
+        # One rounding pass over the block, then records; "t" keeps the "-04:00" offset style
+        bars = view[["Open", "High", "Low", "Close"]].round(2)
+        bars.columns = ["o", "h", "l", "c"]
+        bars.insert(0, "t", view.index.map(pd.Timestamp.isoformat))
+        candles = bars.to_dict(orient="records")
         payload = {
             "symbol": SYMBOL,
             "date": now.strftime('%Y-%m-%d'),
-            "session_open": times["open"].isoformat(),
-            "session_close": times["trade_end"].isoformat(),
+            "session_open": times["open"],
+            "session_close": times["trade_end"],
             "candles": candles,
         }
-        with open(INTRADAY_JSON, "w", encoding="utf-8") as f:
-            json.dump(payload, f, ensure_ascii=False, indent=2)
-    except Exception:
-        # best-effort; ignore chart export errors
-        pass
+        write_json(INTRADAY_JSON, payload)
+    except Exception as e:
+        # best-effort: the reports above are already written, but don't hide the failure
+        print(f"intraday chart export failed: {e!r}", file=sys.stderr)
+
+
+def backfill(n_sessions: int) -> None:
+    # Reprocess the last n completed sessions from a single fetch. Live state files
+    # are left untouched; the summary is written once at the end. A replayed session
+    # without a trade has its trade log and summary row cleared; a session missing
+    # its opening range data is skipped and keeps whatever it had.
+    ensure_dirs()
+    now = today_et()
+    df = fetch_intraday_1m(SYMBOL, now, period=f"{YF_MAX_1M_DAYS}d")
+    if df.empty:
+        return
+
+    # Split the sorted index into ET calendar days by position
+    idx = df.index.asi8
+    days = df.index.normalize().unique()
+    starts = np.searchsorted(idx, days.asi8, side="left")
+    ends = np.r_[starts[1:], len(idx)]
+    sessions = [
+        (day.to_pydatetime(), lo, hi)
+        for day, lo, hi in zip(days, starts, ends)
+        if day.weekday() <= 4 and day.date() < now.date()
+    ]
+
+    trades = []
+    replayed = []
+    for d, lo, hi in sessions[-n_sessions:]:
+        day_df = df.iloc[lo:hi]
+        times = session_times(d)
+        orb = compute_opening_range(day_df, times["open"], times["orb_end"])
+        if orb is None:
+            continue
+        st = TradeState(session_date=d.strftime("%Y-%m-%d"))
+        open_i = int(np.searchsorted(day_df.index.asi8, to_ns(times["open"]), side="left"))
+        row_out = run_session(
+            day_df.iloc[open_i:], st, times, orb["high"] + OFFSET_POINTS, orb["low"] - OFFSET_POINTS,
+        )
+        replayed.append(st.session_date)
+        if row_out:
+            write_trade_log(d, [row_out])
+            trades.append(row_out)
+        else:
+            clear_trade_log(d)
+    update_summary(trades, replayed)
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Opening range breakout engine for NQ")
+    parser.add_argument(
+        "--backfill", type=int, metavar="N",
+        help="reprocess the last N completed sessions in one pass instead of a live tick",
+    )
+    args = parser.parse_args()
+    if args.backfill is not None and args.backfill < 1:
+        parser.error("--backfill N must be at least 1")
+    if args.backfill is not None:
+        backfill(args.backfill)
+    else:
+        main()